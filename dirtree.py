@@ -0,0 +1,181 @@
+"""
+Single-pass directory tree snapshot shared by the index generators.
+
+Each directory is read with one os.scandir and its entries are kept with
+the type information the scan already provides (and, optionally, their
+stat data), so listing, sizing and thumbnail selection all read from
+memory instead of listing the same directory again. Each directory's
+thumbnail (the first image in directory order) is picked during the scan.
+A snapshot can be kept current one directory at a time with rescan(),
+add() and remove().
+"""
+
+import os
+from collections import namedtuple
+
+Entry = namedtuple("Entry", "name is_dir is_file is_symlink size mtime_ns")
+
+class DirSnapshot:
+    """
+    The entries of one directory, in directory order, and its thumbnail.
+    mtime_ns is the directory's own mtime from just before it was listed
+    (None without stat), so a later change to its entries can be detected.
+    """
+
+    __slots__ = ("path", "entries", "thumb", "mtime_ns")
+
+    def __init__(self, path, entries, thumb, mtime_ns=None):
+        self.path = path
+        self.entries = entries
+        self.thumb = thumb
+        self.mtime_ns = mtime_ns
+
+    @property
+    def size(self):
+        """Total size of the immediate files (needs a snapshot taken with stat)."""
+        return sum(e.size for e in self.entries if e.is_file and e.size is not None)
+
+def scan_directory(path, is_image, stat=True):
+    """
+    Read one directory into a DirSnapshot.
+
+    Types come from the directory listing itself; with stat, files are
+    stat()ed once for size and mtime, and so is the directory. Raises
+    OSError if the directory cannot be listed.
+    """
+    entries = []
+    thumb = None
+    # Taken before listing: a change during the scan leaves a newer mtime behind
+    dir_mtime_ns = os.stat(path).st_mtime_ns if stat else None
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+                is_file = not is_dir and entry.is_file()
+                size = mtime_ns = None
+                if stat and is_file:
+                    st = entry.stat()
+                    size, mtime_ns = st.st_size, st.st_mtime_ns
+                entries.append(Entry(entry.name, is_dir, is_file, entry.is_symlink(), size, mtime_ns))
+            except OSError as e:
+                print(f"Error getting info for {entry.path}: {e}")
+                continue
+            if thumb is None and is_file and is_image(entry.name):
+                thumb = entry.name
+    return DirSnapshot(path, entries, thumb, dir_mtime_ns)
+
+class TreeSnapshot:
+    """
+    Every directory under base_dir, each scanned exactly once.
+
+    Directories are kept parents-before-children in a dict keyed by path
+    (joined from base_dir, as os.walk would produce them). Symlinked
+    directories are listed by their parent but only descended into with
+    follow_symlinks, and then each real directory is visited once.
+    Directories that cannot be listed are reported and left out, like
+    os.walk does.
+    """
+
+    def __init__(self, base_dir, is_image, stat=True, follow_symlinks=False):
+        self.base_dir = base_dir
+        self.is_image = is_image
+        self.stat = stat
+        self.follow_symlinks = follow_symlinks
+        self.dirs = {}
+        # Thumbnails of directories listed but not walked (symlinks)
+        self.extra_thumbs = {}
+        self._walk(base_dir)
+
+    def _walk(self, root):
+        """Scan root and everything below it; returns the paths scanned."""
+        walked = []
+        visited = set()
+        stack = [root]
+        while stack:
+            path = stack.pop()
+            if self.follow_symlinks:
+                try:
+                    st = os.stat(path)
+                except OSError as e:
+                    print(f"Error scanning folder {path}: {e}")
+                    continue
+                if (st.st_dev, st.st_ino) in visited:
+                    continue
+                visited.add((st.st_dev, st.st_ino))
+            try:
+                snap = scan_directory(path, self.is_image, self.stat)
+            except OSError as e:
+                print(f"Error scanning folder {path}: {e}")
+                continue
+            self.dirs[path] = snap
+            walked.append(path)
+            stack.extend(os.path.join(path, e.name) for e in reversed(snap.entries)
+                         if e.is_dir and (self.follow_symlinks or not e.is_symlink))
+        return walked
+
+    def __contains__(self, path):
+        return path in self.dirs
+
+    def __getitem__(self, path):
+        return self.dirs[path]
+
+    def __iter__(self):
+        return iter(self.dirs)
+
+    def __len__(self):
+        return len(self.dirs)
+
+    def changed(self, path):
+        """
+        True if a directory's entries may have changed since it was scanned
+        (its mtime moved on, or it is gone). Needs a snapshot taken with stat.
+        """
+        try:
+            return os.stat(path).st_mtime_ns != self.dirs[path].mtime_ns
+        except OSError:
+            return True
+
+    def rescan(self, path):
+        """
+        Read one directory of the snapshot again, without descending.
+        Returns its previous DirSnapshot; raises OSError (and leaves the
+        snapshot alone) if it cannot be listed anymore.
+        """
+        snap = scan_directory(path, self.is_image, self.stat)
+        old = self.dirs.get(path)
+        self.dirs[path] = snap
+        # Thumbnails of symlinked subdirectories are read again on demand.
+        for entry in snap.entries:
+            self.extra_thumbs.pop(os.path.join(path, entry.name), None)
+        return old
+
+    def add(self, path):
+        """Walk a new directory and everything below it; returns the paths added."""
+        return self._walk(path)
+
+    def remove(self, path):
+        """Drop a directory and everything below it; returns the paths dropped."""
+        prefix = os.path.join(path, "")
+        dropped = [p for p in self.dirs if p == path or p.startswith(prefix)]
+        for p in dropped:
+            del self.dirs[p]
+        self.extra_thumbs.pop(path, None)
+        return dropped
+
+    def first_image(self, path):
+        """
+        Thumbnail of a directory. Directories outside the snapshot (not
+        walked symlinks, or ones that could not be read) are scanned once
+        on first use; None if there is no image or it cannot be read.
+        """
+        snap = self.dirs.get(path)
+        if snap is not None:
+            return snap.thumb
+        if path not in self.extra_thumbs:
+            try:
+                thumb = scan_directory(path, self.is_image, stat=False).thumb
+            except OSError as e:
+                print(f"Error reading {path}: {e}")
+                thumb = None
+            self.extra_thumbs[path] = thumb
+        return self.extra_thumbs[path]
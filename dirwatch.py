@@ -0,0 +1,131 @@
+"""
+Directory watching on Linux inotify, through ctypes.
+
+TreeWatcher keeps one inotify watch per directory and maps the events back
+to the path of the directory they happened in. Watches are not recursive:
+directories created later have to be added with watch(), and removed ones
+dropped with unwatch().
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+
+# Event masks, from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+
+# Changes to the entries of a directory, and to the directory itself
+DIR_CHANGES = (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_CLOSE_WRITE
+               | IN_DELETE_SELF | IN_MOVE_SELF)
+
+# struct inotify_event: int wd; uint32_t mask, cookie, len; char name[len]
+EVENT = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+_libc = None
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        _libc = libc
+    return _libc
+
+def _check(result, path=None):
+    if result < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno), path)
+    return result
+
+class TreeWatcher:
+    """
+    A set of watched directories on one inotify instance.
+
+    read() returns (directory, name, mask) events. name is empty for events
+    about the directory itself, and an IN_Q_OVERFLOW event (directory None)
+    means events were dropped because the kernel queue was full.
+    """
+
+    def __init__(self, mask=DIR_CHANGES):
+        self.libc = _load_libc()
+        self.mask = mask | IN_ONLYDIR | IN_DONT_FOLLOW
+        self.fd = _check(self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC))
+        self.paths = {}  # {wd: path}
+        self.wds = {}    # {path: wd}
+
+    def watch(self, path):
+        """Start watching a directory. Raises OSError, e.g. ENOSPC past max_user_watches."""
+        wd = _check(self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.mask), path)
+        # A directory moved to a new path keeps its watch descriptor.
+        old = self.paths.get(wd)
+        if old is not None and old != path:
+            del self.wds[old]
+        self.paths[wd] = path
+        self.wds[path] = wd
+
+    def unwatch(self, path):
+        wd = self.wds.pop(path, None)
+        if wd is None:
+            return
+        del self.paths[wd]
+        # Fails harmlessly if the kernel already dropped it (directory deleted).
+        self.libc.inotify_rm_watch(self.fd, wd)
+
+    def __contains__(self, path):
+        return path in self.wds
+
+    def __len__(self):
+        return len(self.wds)
+
+    def read(self, timeout=None):
+        """Wait up to timeout seconds (None: forever) and return the pending events."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, READ_SIZE)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT.unpack_from(data, offset)
+                offset += EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    events.append((None, "", mask))
+                    continue
+                path = self.paths.get(wd)
+                if path is None:
+                    continue  # watch already removed
+                if mask & IN_IGNORED:
+                    # The kernel dropped the watch (directory deleted or unmounted).
+                    del self.paths[wd]
+                    if self.wds.get(path) == wd:
+                        del self.wds[path]
+                    continue
+                events.append((path, name, mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
@@ -0,0 +1,106 @@
+"""
+Precompiled page templates for the directory index generators.
+
+A page is a header with a few {placeholders}, an optional parent link, one
+fragment per entry and a fixed footer. The header is split into its
+static chunks and placeholders once, and the static parts are encoded to
+UTF-8 up front, so rendering a page only escapes and encodes the values
+and the entry fragments. Entry fragments are collected and joined instead
+of concatenated one by one. A page can be rendered to bytes, or streamed
+straight into a file for very large directories.
+
+Entry names are percent-encoded where they are used in URLs and
+HTML-escaped everywhere they appear in markup.
+"""
+
+import hashlib
+import html
+from string import Formatter
+from urllib.parse import quote
+
+PARENT_LINK = '<a class="parent-link" href="../index.html" target="contentFrame">[..] Parent Directory</a>\n'
+LISTING_OPEN = '<div class="listing">\n'
+FOOTER = """</div>
+</body>
+</html>
+"""
+
+# Entries are encoded and written in batches when streaming
+STREAM_BATCH = 256
+
+def url(name):
+    """A file name as a relative URL, escaped for an attribute."""
+    return html.escape(quote(name))
+
+def text(name):
+    return html.escape(name)
+
+def dir_item(name, thumb=None):
+    """A subfolder, with the thumbnail image picked inside it if any."""
+    item = f'<div class="item"><a href="{url(name)}/index.html" target="contentFrame">{text(name)}/</a>'
+    if thumb:
+        item += f'<br><img src="{url(name)}/{url(thumb)}" alt="Thumbnail for {text(name)}">'
+    return item + '</div>\n'
+
+def file_item(name, image=False):
+    """A file; images are shown as well as linked."""
+    if image:
+        return (f'<div class="item"><a href="{url(name)}" target="contentFrame">{text(name)}</a><br>'
+                f'<img src="{url(name)}" alt="{text(name)}"></div>\n')
+    return f'<div class="item"><a href="{url(name)}" target="contentFrame">{text(name)}</a></div>\n'
+
+class IndexTemplate:
+    """
+    A header template (str.format syntax, so literal braces are doubled)
+    compiled into static byte chunks and placeholder names.
+
+    Placeholder values are HTML-escaped when the page is rendered.
+    digest identifies the page format (header, fixed parts and entry
+    markup), so cached pages can be told apart from ones a different
+    format would produce.
+    """
+
+    def __init__(self, header):
+        self.chunks = []
+        for literal, field, _, _ in Formatter().parse(header):
+            if literal:
+                self.chunks.append(literal.encode("utf-8"))
+            if field is not None:
+                self.chunks.append(field)
+        self.parent_link = PARENT_LINK.encode("utf-8")
+        self.listing_open = LISTING_OPEN.encode("utf-8")
+        self.footer = FOOTER.encode("utf-8")
+        # Sample entries cover the entry markup and how names are escaped.
+        samples = [dir_item("a b&<'\"é"), dir_item("a b&", "t é.png"), file_item("a b&"), file_item("é.png", True)]
+        h = hashlib.sha1()
+        for part in self.chunks + [self.parent_link, self.listing_open, self.footer] + samples:
+            h.update(repr(part).encode("utf-8"))
+        self.digest = h.hexdigest()
+
+    def head(self, values, parent_link):
+        """Encoded chunks up to and including the opening of the listing."""
+        parts = [c if isinstance(c, bytes) else text(str(values[c])).encode("utf-8") for c in self.chunks]
+        if parent_link:
+            parts.append(self.parent_link)
+        parts.append(self.listing_open)
+        return parts
+
+    def render(self, values, items, parent_link=False):
+        """The whole page as bytes; items are entry fragments (str)."""
+        parts = self.head(values, parent_link)
+        parts.append("".join(items).encode("utf-8"))
+        parts.append(self.footer)
+        return b"".join(parts)
+
+    def stream(self, f, values, items, parent_link=False):
+        """Write the page to a binary file as the items are produced."""
+        f.writelines(self.head(values, parent_link))
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= STREAM_BATCH:
+                f.write("".join(batch).encode("utf-8"))
+                batch.clear()
+        if batch:
+            f.write("".join(batch).encode("utf-8"))
+        f.write(self.footer)
@@ -1,14 +1,26 @@
 import os
 import time
 import threading
-import difflib
 import psutil
 import json
+import hashlib
+import argparse
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from dirtree import TreeSnapshot
+from dirwatch import IN_CLOSE_WRITE, IN_CREATE, IN_DELETE_SELF, IN_MOVE_SELF, IN_Q_OVERFLOW, TreeWatcher
+from indexpage import IndexTemplate, dir_item, file_item
+
 # --- Configuration ---
 IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp'}
-FOLDER_SIZES_FILE = "folder_sizes.json"
+MANIFEST_FILE = "index_manifest.json"
+MANIFEST_VERSION = 1
+# Compare rewritten indexes with their previous version (--similarity)
+REPORT_SIMILARITY = False
+# Watch mode: wait for this many quiet seconds before acting on a burst of
+# changes, but never delay an update longer than WATCH_MAX_DELAY.
+WATCH_DEBOUNCE = 0.5
+WATCH_MAX_DELAY = 5.0
 
 # --- Global Counters & Stats ---
 stats = {
@@ -18,7 +30,7 @@ stats = {
     "errors": 0,
 }
 eval_times = {}           # {folder: evaluation time in sec}
-similarities = {}         # {folder: similarity ratio (if index existed)}
+similarities = {}         # {folder: line Jaccard similarity (with --similarity)}
 folder_cpu_cycles = {}    # {folder: estimated CPU cycles used}
 folder_mem_diff = {}      # {folder: memory difference in bytes during processing}
 folder_size_diff = {}     # {folder: absolute difference in bytes from cached size}
@@ -37,34 +49,13 @@ counter_lock = threading.Lock()
 # Get our process handle for memory and CPU timing.
 process = psutil.Process(os.getpid())
 
-def is_image(filename):
-    _, ext = os.path.splitext(filename.lower())
-    return ext in IMAGE_EXTENSIONS
-
-def get_first_image_in_folder(folder_path):
-    try:
-        with os.scandir(folder_path) as it:
-            for entry in it:
-                if entry.is_file() and is_image(entry.name):
-                    return entry.name
-    except Exception as e:
-        print(f"Error reading {folder_path}: {e}")
-    return None
-
-def compute_bg_path(current_dir, base_dir):
-    rel = os.path.relpath(base_dir, current_dir)
-    return os.path.join(rel if rel != '.' else '', "background.mp3").replace("\\", "/")
-
-def generate_html_for_directory(current_dir, base_dir):
-    bg_path = compute_bg_path(current_dir, base_dir)
-    current_abs = os.path.abspath(current_dir)
-    base_abs = os.path.abspath(base_dir)
-    html_content = f"""<!DOCTYPE html>
+# Page header; compiled once, {title} and {bg_path} are filled in per folder.
+PAGE = IndexTemplate("""<!DOCTYPE html>
 <html lang="en">
 <head>
   <meta charset="UTF-8">
   <meta name="viewport" content="width=device-width, initial-scale=1.0">
-  <title>Index of {current_abs}</title>
+  <title>Index of {title}</title>
   <style>
     body {{
       background-color: #2a0031;
@@ -106,135 +97,191 @@ def generate_html_for_directory(current_dir, base_dir):
   </style>
 </head>
 <body>
-  <h1>Index of {current_abs}</h1>
-"""
-    if current_abs != base_abs:
-        html_content += '<a class="parent-link" href="../index.html" target="contentFrame">[..] Parent Directory</a>\n'
-    html_content += '<div class="listing">\n'
-    try:
-        entries = sorted(os.scandir(current_dir), key=lambda e: e.name.lower())
-    except Exception as e:
-        print(f"Error listing directory {current_dir}: {e}")
-        entries = []
-    for entry in entries:
+  <h1>Index of {title}</h1>
+""")
+
+def is_image(filename):
+    _, ext = os.path.splitext(filename.lower())
+    return ext in IMAGE_EXTENSIONS
+
+def compute_bg_path(current_dir, base_dir):
+    rel = os.path.relpath(base_dir, current_dir)
+    return os.path.join(rel if rel != '.' else '', "background.mp3").replace("\\", "/")
+
+def generate_html_for_directory(current_dir, base_dir, snapshot):
+    """Render the index page of current_dir as UTF-8 bytes."""
+    current_abs = os.path.abspath(current_dir)
+    items = []
+    for entry in sorted(snapshot[current_dir].entries, key=lambda e: e.name.lower()):
         if entry.name == "index.html":
             continue
-        if entry.is_dir():
-            thumb = get_first_image_in_folder(os.path.join(current_dir, entry.name))
-            item_html = f'<div class="item"><a href="{entry.name}/index.html" target="contentFrame">{entry.name}/</a>'
-            if thumb:
-                item_html += f'<br><img src="{entry.name}/{thumb}" alt="Thumbnail for {entry.name}">'
-            item_html += '</div>\n'
-            html_content += item_html
-        elif entry.is_file():
-            item_html = '<div class="item">'
-            if is_image(entry.name):
-                item_html += f'<a href="{entry.name}" target="contentFrame">{entry.name}</a><br>'
-                item_html += f'<img src="{entry.name}" alt="{entry.name}">'
-            else:
-                item_html += f'<a href="{entry.name}" target="contentFrame">{entry.name}</a>'
-            item_html += '</div>\n'
-            html_content += item_html
-    html_content += """</div>
-</body>
-</html>
-"""
-    return html_content
-
-def compute_folder_size(folder_path):
-    """Compute total size (in bytes) of immediate files in a folder."""
-    total = 0
+        if entry.is_dir:
+            items.append(dir_item(entry.name, snapshot.first_image(os.path.join(current_dir, entry.name))))
+        elif entry.is_file:
+            items.append(file_item(entry.name, is_image(entry.name)))
+    values = {"title": current_abs, "bg_path": compute_bg_path(current_dir, base_dir)}
+    return PAGE.render(values, items, parent_link=current_abs != os.path.abspath(base_dir))
+
+# --- Fingerprint Manifest ---
+def compute_fingerprints(snapshot, base_dir):
+    """
+    Fingerprint every folder from its own entries and its children's
+    thumbnails.
+
+    A folder's index shows each subfolder's thumbnail, so the thumbnail
+    chosen in a child is part of the parent's fingerprint: when it changes
+    the parent is dirty too, while other changes inside the child leave the
+    parent alone. Subfolder mtimes are deliberately not included, they
+    change whenever the child's own index.html is rewritten.
+    """
+    return {folder: folder_fingerprint(snapshot, folder, base_dir) for folder in snapshot}
+
+def folder_fingerprint(snapshot, folder, base_dir):
+    base_abs = os.path.abspath(base_dir)
+    manifest_abs = os.path.abspath(MANIFEST_FILE)
+    folder_abs = os.path.abspath(folder)
+    entries = []
+    for entry in snapshot[folder].entries:
+        if entry.name == "index.html":
+            continue
+        if entry.is_dir:
+            thumb = snapshot.first_image(os.path.join(folder, entry.name))
+            entries.append((entry.name, "d", thumb))
+        elif entry.is_file:
+            size, mtime_ns = entry.size, entry.mtime_ns
+            if os.path.join(folder_abs, entry.name) == manifest_abs:
+                # Rewritten on every run; only its name shows in the index.
+                size = mtime_ns = None
+            entries.append((entry.name, "f", size, mtime_ns))
+    entries.sort()
+    # The page format is included, so a template change rewrites every index.
+    h = hashlib.sha1(repr((MANIFEST_VERSION, PAGE.digest, folder_abs, base_abs, entries)).encode("utf-8"))
+    return h.hexdigest()
+
+def content_hash(page):
+    return hashlib.sha1(page).hexdigest()
+
+def line_similarity(old, new):
+    """Jaccard similarity of the two texts' sets of lines; linear time."""
+    old_lines, new_lines = set(old.splitlines()), set(new.splitlines())
+    union = old_lines | new_lines
+    return len(old_lines & new_lines) / len(union) if union else 1.0
+
+def index_stamp(index_file):
+    """(size, mtime_ns) of an index file, or None if it is missing."""
     try:
-        with os.scandir(folder_path) as it:
-            for entry in it:
-                if entry.is_file():
-                    try:
-                        total += entry.stat().st_size
-                    except Exception as e:
-                        print(f"Error getting size for {entry.path}: {e}")
-    except Exception as e:
-        print(f"Error scanning folder {folder_path}: {e}")
-    return total
+        st = os.stat(index_file)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
 
-# --- Load/Save Folder Size Cache ---
-def load_folder_sizes():
-    if os.path.exists(FOLDER_SIZES_FILE):
+def is_dirty(current_dir, fingerprint, manifest):
+    """
+    True unless the manifest shows this exact fingerprint and the index.html
+    it produced is still there, untouched since it was written.
+    """
+    record = manifest.get(current_dir)
+    if record is None or record.get("fp") != fingerprint:
+        return True
+    return record.get("index") != index_stamp(os.path.join(current_dir, "index.html"))
+
+# --- Load/Save Manifest ---
+def load_manifest():
+    if os.path.exists(MANIFEST_FILE):
         try:
-            with open(FOLDER_SIZES_FILE, "r") as f:
-                return json.load(f)
+            with open(MANIFEST_FILE, "r") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                return data["folders"]
         except Exception as e:
-            print(f"Error loading {FOLDER_SIZES_FILE}: {e}")
+            print(f"Error loading {MANIFEST_FILE}: {e}")
     return {}
 
-def save_folder_sizes(sizes):
+def save_manifest(manifest):
+    # Written to a temporary file first so an interrupted run never leaves a
+    # half-written manifest behind.
+    tmp = MANIFEST_FILE + ".tmp"
     try:
-        with open(FOLDER_SIZES_FILE, "w") as f:
-            json.dump(sizes, f, indent=2)
+        with open(tmp, "w") as f:
+            f.write(json.dumps({"version": MANIFEST_VERSION, "folders": manifest}))
+        os.replace(tmp, MANIFEST_FILE)
     except Exception as e:
-        print(f"Error saving {FOLDER_SIZES_FILE}: {e}")
+        print(f"Error saving {MANIFEST_FILE}: {e}")
 
 # --- Main Processing Function ---
-def write_index(current_dir, base_dir, folder_sizes):
+def record_unchanged(current_dir, manifest, new_manifest, start_wall):
+    """Carry a clean folder's manifest record over and count it as skipped."""
+    new_manifest[current_dir] = manifest[current_dir]
+    with stats_lock:
+        stats["same"] += 1
+    folder_act_log[current_dir] = "skipped"
+    duration = time.perf_counter() - start_wall
+    eval_times[current_dir] = duration
+    if REPORT_SIMILARITY:
+        similarities[current_dir] = 1.0  # Assume 100% similarity
+    folder_size_diff[current_dir] = 0
+
+def write_index(current_dir, base_dir, snapshot, manifest, new_manifest, fingerprint):
     global total_cpu_cycles
     start_wall = time.perf_counter()
     start_cpu = time.process_time()
     start_mem = process.memory_info().rss
 
-    current_folder_size = compute_folder_size(current_dir)
-    skip_folder = False
-    prev_size = folder_sizes.get(current_dir, None)
+    folder_size = snapshot[current_dir].size
+    record = manifest.get(current_dir) or {}
+    prev_size = record.get("size")
     # Determine bytes changed (if previous size exists)
     if prev_size is not None:
-        size_diff = abs(current_folder_size - prev_size)
+        size_diff = abs(folder_size - prev_size)
     else:
-        size_diff = current_folder_size
-
-    # Check if folder size is unchanged.
-    if prev_size is not None and current_folder_size == prev_size:
-        skip_folder = True
-
-    if skip_folder:
-        with stats_lock:
-            stats["same"] += 1
-        folder_act_log[current_dir] = "skipped"
-        duration = time.perf_counter() - start_wall
-        eval_times[current_dir] = duration
-        similarities[current_dir] = 1.0  # Assume 100% similarity
-        folder_size_diff[current_dir] = 0
+        size_diff = folder_size
+    index_file = os.path.join(current_dir, "index.html")
+
+    if not is_dirty(current_dir, fingerprint, manifest):
+        record_unchanged(current_dir, manifest, new_manifest, start_wall)
     else:
         # Process the folder normally: generate and write index.html.
-        html = generate_html_for_directory(current_dir, base_dir)
-        index_file = os.path.join(current_dir, "index.html")
+        page = generate_html_for_directory(current_dir, base_dir, snapshot)
+        digest = content_hash(page)
         sim_ratio = None
         try:
-            # Update folder size cache immediately since size has changed
-            folder_sizes[current_dir] = current_folder_size
-            if os.path.exists(index_file):
-                with open(index_file, "r", encoding="utf-8") as f:
-                    existing = f.read()
-                sim_ratio = difflib.SequenceMatcher(None, existing, html).ratio()
-                if existing == html:
-                    with stats_lock:
-                        stats["same"] += 1
-                    folder_act_log[current_dir] = "skipped"
-                    duration = time.perf_counter() - start_wall
-                    eval_times[current_dir] = duration
-                    similarities[current_dir] = sim_ratio
-                    folder_size_diff[current_dir] = size_diff
-                    return
-            with open(index_file, "w", encoding="utf-8") as f:
-                f.write(html)
+            stamp = index_stamp(index_file)
+            # The manifest knows what the index on disk holds as long as
+            # nobody touched it since it was written, so it is never read.
+            if stamp is not None and record.get("hash") == digest and record.get("index") == stamp:
+                new_manifest[current_dir] = {"fp": fingerprint, "size": folder_size,
+                                             "hash": digest, "index": stamp}
+                with stats_lock:
+                    stats["same"] += 1
+                folder_act_log[current_dir] = "skipped"
+                duration = time.perf_counter() - start_wall
+                eval_times[current_dir] = duration
+                if REPORT_SIMILARITY:
+                    similarities[current_dir] = 1.0
+                folder_size_diff[current_dir] = size_diff
+                return
+            if REPORT_SIMILARITY and stamp is not None:
+                with open(index_file, "r", encoding="utf-8", errors="replace") as f:
+                    sim_ratio = line_similarity(f.read(), page.decode("utf-8"))
+            with open(index_file, "wb") as f:
+                f.write(page)
+            # Only recorded once written, so a failed write is retried next run
+            new_manifest[current_dir] = {"fp": fingerprint, "size": folder_size,
+                                         "hash": digest, "index": index_stamp(index_file)}
             with stats_lock:
                 stats["changed"] += 1
             parent = os.path.dirname(current_dir)
             with stats_lock:
                 changes_by_parent[parent] = changes_by_parent.get(parent, 0) + 1
             folder_act_log[current_dir] = "acted"
-            sim_ratio = sim_ratio if sim_ratio is not None else 0.0
             eval_times[current_dir] = time.perf_counter() - start_wall
-            similarities[current_dir] = sim_ratio
             folder_size_diff[current_dir] = size_diff
-            print(f"Generated {index_file} in {eval_times[current_dir]:.6f} sec (sim: {similarities[current_dir]:.6f}), bytes changed: {size_diff}", flush=True)
+            if REPORT_SIMILARITY:
+                sim_ratio = sim_ratio if sim_ratio is not None else 0.0
+                similarities[current_dir] = sim_ratio
+                print(f"Generated {index_file} in {eval_times[current_dir]:.6f} sec (sim: {sim_ratio:.6f}), bytes changed: {size_diff}", flush=True)
+            else:
+                print(f"Generated {index_file} in {eval_times[current_dir]:.6f} sec, bytes changed: {size_diff}", flush=True)
         except Exception as e:
             print(f"Error writing {index_file}: {e}", flush=True)
             with stats_lock:
@@ -260,22 +307,181 @@ def write_index(current_dir, base_dir, folder_sizes):
     with counter_lock:
         total_cpu_cycles += cpu_cycles
 
+# --- Watch Mode ---
+def update_folders(folders, base_dir, snapshot, manifest):
+    """Regenerate the indexes of the folders whose fingerprint no longer matches."""
+    written = 0
+    for folder in folders:
+        fingerprint = folder_fingerprint(snapshot, folder, base_dir)
+        if is_dirty(folder, fingerprint, manifest):
+            write_index(folder, base_dir, snapshot, manifest, manifest, fingerprint)
+            written += 1
+    return written
+
+class IndexWatcher:
+    """
+    Keeps the indexes below base_dir current from inotify events.
+
+    Events are collected until the tree has been quiet for debounce seconds
+    (or max_delay has passed since the first one). Then only the folders
+    they happened in are read again and regenerated, plus the parent of any
+    folder whose thumbnail changed. New subfolders are walked and watched
+    and removed ones are dropped. If the kernel queue overflows, events
+    were lost: each folder's mtime is checked, and only folders whose
+    entries changed are listed again. The same catch-up runs once at
+    startup, for changes made while the watches were being set up. File
+    contents changing is not visible that way. It does not change the
+    pages, and the next full run refreshes those fingerprints.
+    """
+
+    def __init__(self, base_dir, snapshot, manifest, debounce=WATCH_DEBOUNCE, max_delay=WATCH_MAX_DELAY):
+        self.base_dir = base_dir
+        self.snapshot = snapshot
+        self.manifest = manifest
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.watcher = TreeWatcher()
+        # Our own writes; see also _own_index.
+        self.ignored = {os.path.abspath(MANIFEST_FILE), os.path.abspath(MANIFEST_FILE + ".tmp")}
+        for folder in snapshot:
+            self._watch(folder)
+        # Catch up with whatever changed between the snapshot and the watches.
+        self.resync()
+        save_manifest(self.manifest)
+
+    def _watch(self, folder):
+        try:
+            self.watcher.watch(folder)
+        except OSError as e:
+            print(f"Error watching {folder}: {e}", flush=True)
+
+    def _own_index(self, folder, name, mask):
+        """True for the events of writing an index.html that is still as this process wrote it."""
+        if name != "index.html" or not mask & (IN_CREATE | IN_CLOSE_WRITE):
+            return False
+        record = self.manifest.get(folder)
+        return record is not None and record.get("index") == index_stamp(os.path.join(folder, name))
+
+    def _drop(self, folder):
+        for path in self.snapshot.remove(folder):
+            self.watcher.unwatch(path)
+            self.manifest.pop(path, None)
+
+    def update(self, folders):
+        """Read the given folders again and regenerate what changed; returns the number written."""
+        regenerate = set()
+        while folders:
+            added = []
+            for folder in sorted(folders):
+                if folder not in self.snapshot:
+                    continue  # dropped along with a removed parent
+                try:
+                    old = self.snapshot.rescan(folder)
+                except OSError:
+                    # Deleted or moved away; its parent's listing shows it too.
+                    self._drop(folder)
+                    continue
+                new = self.snapshot[folder]
+                regenerate.add(folder)
+                subdirs = {e.name for e in new.entries if e.is_dir and not e.is_symlink}
+                for entry in old.entries:
+                    if entry.is_dir and not entry.is_symlink and entry.name not in subdirs:
+                        self._drop(os.path.join(folder, entry.name))
+                if old.thumb != new.thumb and folder != self.base_dir:
+                    regenerate.add(os.path.dirname(folder))
+                added.extend(os.path.join(folder, name) for name in subdirs
+                             if os.path.join(folder, name) not in self.snapshot)
+            # Removals are done before anything is watched again, so a folder
+            # moved within the tree keeps its watch at the new path.
+            folders = set()
+            for path in added:
+                for folder in self.snapshot.add(path):
+                    self._watch(folder)
+                    # Read once more now that it is watched, in case it
+                    # changed while it was being walked.
+                    folders.add(folder)
+        return update_folders(sorted(f for f in regenerate if f in self.snapshot),
+                              self.base_dir, self.snapshot, self.manifest)
+
+    def resync(self):
+        """Catch up without events: update the folders whose mtime moved on; returns the number written."""
+        return self.update({folder for folder in self.snapshot if self.snapshot.changed(folder)})
+
+    def run(self):
+        """Handle events until interrupted, or until base_dir itself goes away."""
+        pending = set()
+        overflow = False
+        first = last = None
+        while True:
+            timeout = None
+            if first is not None:
+                timeout = max(0.0, min(last + self.debounce, first + self.max_delay) - time.monotonic())
+            events = self.watcher.read(timeout)
+            now = time.monotonic()
+            for folder, name, mask in events:
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                elif folder == self.base_dir and mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    print(f"{self.base_dir} was moved or deleted, stopped watching.", flush=True)
+                    return
+                elif self._own_index(folder, name, mask) or os.path.join(folder, name) in self.ignored:
+                    continue
+                else:
+                    pending.add(folder)
+                if first is None:
+                    first = now
+                last = now
+            if first is None or now < min(last + self.debounce, first + self.max_delay):
+                continue
+            start = time.perf_counter()
+            if overflow:
+                print("inotify queue overflowed, rescanning the tree.", flush=True)
+                written = self.resync()
+            else:
+                written = self.update(pending)
+            save_manifest(self.manifest)
+            print(f"Updated {written} index file(s) in {time.perf_counter() - start:.6f} sec "
+                  f"({len(self.watcher)} folders watched)", flush=True)
+            pending.clear()
+            overflow = False
+            first = last = None
+
+    def close(self):
+        self.watcher.close()
+
 # --- Main Execution ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate index.html files for every folder below the current one.")
+    parser.add_argument("--similarity", action="store_true",
+                        help="report how similar rewritten indexes are to their previous version")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and update indexes as the tree changes (Linux inotify)")
+    parser.add_argument("--debounce", type=float, default=WATCH_DEBOUNCE,
+                        help=f"quiet seconds to wait for before acting on changes (default {WATCH_DEBOUNCE})")
+    args = parser.parse_args()
+    REPORT_SIMILARITY = args.similarity
+
     overall_start = time.time()
     base_directory = os.path.abspath(".")
-    # Load folder sizes cache.
-    folder_sizes = load_folder_sizes()
+    # Load the fingerprint manifest of the previous run.
+    manifest = load_manifest()
+    new_manifest = {}
 
-    # Gather all directories using os.walk.
-    directories = []
-    for root, dirs, _ in os.walk(base_directory):
-        directories.append(root)
+    # Gather and fingerprint all directories in a single walk.
+    snapshot = TreeSnapshot(base_directory, is_image)
+    fingerprints = compute_fingerprints(snapshot, base_directory)
+    directories = list(snapshot)
 
     futures = []
     with ThreadPoolExecutor(max_workers=4) as executor:
         for d in directories:
-            futures.append(executor.submit(write_index, d, base_directory, folder_sizes))
+            # Clean folders are settled here; only dirty ones go to the pool.
+            start_wall = time.perf_counter()
+            if not is_dirty(d, fingerprints[d], manifest):
+                record_unchanged(d, manifest, new_manifest, start_wall)
+                continue
+            futures.append(executor.submit(write_index, d, base_directory, snapshot, manifest, new_manifest,
+                                           fingerprints[d]))
         # Simple polling loop to print progress.
         total = len(futures)
         try:
@@ -289,8 +495,8 @@ if __name__ == "__main__":
             print("KeyboardInterrupt received. Exiting progress loop...", flush=True)
 
     overall_time = time.time() - overall_start
-    # Save updated folder sizes cache.
-    save_folder_sizes(folder_sizes)
+    # Save the manifest; folders that no longer exist drop out of it.
+    save_manifest(new_manifest)
 
     # Compute summary stats.
     top_longest = sorted(eval_times.items(), key=lambda x: x[1], reverse=True)[:3]
@@ -331,6 +537,17 @@ if __name__ == "__main__":
     print("\nTop 3 Folders by Bytes Changed:")
     for folder, diff in top_size_diff:
         print(f"  {folder}: {diff} bytes", flush=True)
-    print("\nTop 3 Most Similar Folders (unchanged or nearly unchanged):")
-    for folder, sim in top_similar:
-        print(f"  {folder}: Similarity Ratio = {sim:.6f}", flush=True)
+    if REPORT_SIMILARITY:
+        print("\nTop 3 Most Similar Folders (unchanged or nearly unchanged):")
+        for folder, sim in top_similar:
+            print(f"  {folder}: Line Similarity = {sim:.6f}", flush=True)
+
+    if args.watch:
+        print(f"\nWatching {base_directory} for changes (Ctrl+C to stop)...", flush=True)
+        watcher = IndexWatcher(base_directory, snapshot, new_manifest, debounce=args.debounce)
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            print("Stopped watching.", flush=True)
+        finally:
+            watcher.close()
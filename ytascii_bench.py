@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the ytascii rendering path.
+
+Feeds synthetic frames (and optionally frames from a recorded video) through
+the renderer for every combination of terminal size, character set and color
+mode, and reports frames/sec, bytes emitted per frame and peak memory.
+
+Paths measured for each combination:
+- frame_to_ascii: the plain full-frame API (resize + encode)
+- playback: resize + coalesced delta rendering, as the player does it
+- palette: RGB -> xterm-256 mapping of the resized frame (256-color only)
+
+Results are saved as JSON; --compare OLD.json diffs a run against an earlier
+one, e.g. from another revision.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+import ytascii
+
+DEFAULT_SIZES = "80x24,120x40,200x60"
+COLOR_MODES = ["none", "256", "truecolor"]
+
+# --- Frame Sources ---
+def synthetic_frames(kind, count, width=640, height=360, seed=0):
+    """Generate a deterministic list of BGR frames."""
+    rng = np.random.default_rng(seed)
+    if kind == "noise":
+        # Worst case: every cell changes color every frame.
+        return [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+    # "scene": a gradient background with a moving ball, mostly static.
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    background = np.empty((height, width, 3), dtype=np.uint8)
+    background[..., 0] = x
+    background[..., 1] = y
+    background[..., 2] = 128
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        cx = int((i * 7) % width)
+        cv2.circle(frame, (cx, height // 2), height // 6, (255, 255, 255), -1)
+        frames.append(frame)
+    return frames
+
+def recorded_frames(path, count):
+    """Read up to count frames from a video file."""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    try:
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+    finally:
+        cap.release()
+    if not frames:
+        sys.exit(f"No frames could be read from {path}")
+    return frames
+
+# --- Measured Paths ---
+def run_frame_to_ascii(frames, cols, rows, chars, color_mode):
+    total = 0
+    for frame in frames:
+        total += len(ytascii.frame_to_ascii(frame, cols, rows, chars, color_mode).encode("utf-8"))
+    return total
+
+def run_playback(frames, cols, rows, chars, color_mode):
+    display = ytascii.DeltaRenderer(ytascii.get_renderer(chars, color_mode, coalesce=True))
+    total = 0
+    for frame in frames:
+        color_resized, gray = ytascii.resize_frame(frame, cols, rows)
+        total += len(display.render(color_resized, gray, (cols, rows)).encode("utf-8"))
+    return total
+
+def run_palette(frames, cols, rows, chars, color_mode):
+    palette = ytascii.get_palette()
+    for frame in frames:
+        palette.map(ytascii.resize_frame(frame, cols, rows)[0])
+    return 0
+
+PATHS = {
+    "frame_to_ascii": run_frame_to_ascii,
+    "playback": run_playback,
+    "palette": run_palette,
+}
+
+def measure(run, frames, cols, rows, chars, color_mode, repeat):
+    """Best-of-repeat frames/sec, bytes per frame and traced peak memory."""
+    run(frames[:1], cols, rows, chars, color_mode)  # warm lookup tables
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        total_bytes = run(frames, cols, rows, chars, color_mode)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    # Peak memory is measured in a separate pass; tracing skews the timings.
+    tracemalloc.start()
+    run(frames, cols, rows, chars, color_mode)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "fps": len(frames) / best if best else float("inf"),
+        "bytes_per_frame": total_bytes / len(frames),
+        "peak_bytes": peak,
+    }
+
+def scalar_rgb_to_256_rate(samples=200000):
+    """Pixels/sec of the per-pixel rgb_to_256, for reference."""
+    rgb = np.random.default_rng(1).integers(0, 256, (samples, 3), dtype=np.uint8)
+    start = time.perf_counter()
+    for r, g, b in rgb:
+        ytascii.rgb_to_256(r, g, b)
+    return samples / (time.perf_counter() - start)
+
+# --- Reporting ---
+def result_key(result):
+    return (result["source"], result["size"], result["charset"], result["color_mode"], result["path"])
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def compare(old_path, results):
+    with open(old_path, "r") as f:
+        old = {result_key(r): r for r in json.load(f)["results"]}
+    print(f"\n--- Compared with {old_path} ---")
+    print(f"{'case':<52} {'fps':>16} {'bytes/frame':>20}")
+    for result in results:
+        prev = old.get(result_key(result))
+        if prev is None:
+            continue
+        fps_ratio = result["fps"] / prev["fps"] if prev["fps"] else float("inf")
+        bytes_ratio = result["bytes_per_frame"] / prev["bytes_per_frame"] if prev["bytes_per_frame"] else 1.0
+        case = " ".join(result_key(result))
+        print(f"{case:<52} {fps_ratio:>15.2f}x {bytes_ratio:>19.2f}x")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", help="also benchmark frames read from this video file")
+    parser.add_argument("--frames", type=int, default=30, help="frames per source (default 30)")
+    parser.add_argument("--repeat", type=int, default=3, help="timing repetitions, best is kept (default 3)")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"terminal sizes COLSxROWS (default {DEFAULT_SIZES})")
+    parser.add_argument("--charsets", default="ABC", help="character sets to run (default ABC)")
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--compare", metavar="OLD_JSON", help="print ratios against an earlier results file")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    sizes = [tuple(int(v) for v in size.lower().split("x")) for size in args.sizes.split(",")]
+    sources = {kind: synthetic_frames(kind, args.frames) for kind in ("scene", "noise")}
+    if args.video:
+        sources["recorded"] = recorded_frames(args.video, args.frames)
+
+    results = []
+    print(f"{'case':<52} {'fps':>10} {'bytes/frame':>12} {'peak KiB':>10}")
+    for source, frames in sources.items():
+        for cols, rows in sizes:
+            for charset in args.charsets.upper():
+                chars = ytascii.CHARSETS[charset]
+                for color_mode in COLOR_MODES:
+                    for path, run in PATHS.items():
+                        if path == "palette" and (color_mode != "256" or charset != args.charsets[0].upper()):
+                            continue
+                        stats = measure(run, frames, cols, rows, chars, color_mode, args.repeat)
+                        result = {"source": source, "size": f"{cols}x{rows}", "charset": charset,
+                                  "color_mode": color_mode, "path": path, **stats}
+                        results.append(result)
+                        case = " ".join(result_key(result))
+                        print(f"{case:<52} {stats['fps']:>10.1f} {stats['bytes_per_frame']:>12.0f} "
+                              f"{stats['peak_bytes'] / 1024:>10.0f}", flush=True)
+
+    scalar_rate = scalar_rgb_to_256_rate()
+    print(f"\nScalar rgb_to_256: {scalar_rate:,.0f} pixels/sec")
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "frames": args.frames,
+            "repeat": args.repeat,
+            "scalar_rgb_to_256_pixels_per_sec": scalar_rate,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+if __name__ == "__main__":
+    main()
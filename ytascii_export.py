@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Headless export of ytascii renderings to a file.
+
+Decodes a video (a local file, or a URL fetched with yt-dlp) as fast as the
+CPU allows, renders every frame with frame_to_ascii and writes either an
+asciicast v2 recording (for asciinema players and web pages) or a raw frame
+stream. Nothing is paced: timestamps come from the frame rate alone.
+
+Raw streams are a sequence of records, each a header line
+"<seconds> <length>\\n" followed by <length> bytes of UTF-8 frame text.
+
+The video is split into segments that worker processes decode and render
+independently (each seeks to its own segment), so every core is used for
+decoding as well as rendering; the results are written back in order.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+
+import ytascii
+
+CLEAR = "\033[H\033[J"
+
+# --- Rendering ---
+def render_segment(task):
+    """Render frames [start, stop) of a video; returns their frame strings."""
+    path, start, stop, cols, rows, chars, color_mode, palette = task
+    cap = cv2.VideoCapture(path)
+    frames = []
+    try:
+        if start:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        for _ in range(start, stop):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(ytascii.frame_to_ascii(frame, cols, rows, chars, color_mode, palette))
+    finally:
+        cap.release()
+    return frames
+
+def render_frames(path, cols, rows, chars, color_mode, palette="cube", processes=None, segment=120):
+    """
+    Yield the rendered frames of a video in order.
+
+    With more than one process the frame range is cut into segments of
+    segment frames for a process pool. Frames past the container's frame
+    count (which can be an estimate) are rendered here afterwards.
+    """
+    cap = cv2.VideoCapture(path)
+    count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    processes = processes or os.cpu_count() or 1
+    done = 0
+    if processes > 1 and count > segment:
+        tasks = [(path, start, min(start + segment, count), cols, rows, chars, color_mode, palette)
+                 for start in range(0, count, segment)]
+        with multiprocessing.Pool(processes) as pool:
+            for frames in pool.imap(render_segment, tasks):
+                yield from frames
+                done += len(frames)
+    # Sequential path, and the tail beyond an underestimated frame count.
+    cap = cv2.VideoCapture(path)
+    try:
+        if done:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, done)
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield ytascii.frame_to_ascii(frame, cols, rows, chars, color_mode, palette)
+    finally:
+        cap.release()
+
+# --- Output Formats ---
+class AsciicastWriter:
+    """asciicast v2: a JSON header line, then one [time, "o", data] event per frame."""
+
+    def __init__(self, f, cols, rows, title=None):
+        self.f = f
+        header = {"version": 2, "width": cols, "height": rows, "timestamp": int(time.time()),
+                  "env": {"TERM": "xterm-256color"}}
+        if title:
+            header["title"] = title
+        f.write(json.dumps(header).encode("utf-8") + b"\n")
+
+    def write(self, t, frame):
+        # Players emulate a terminal without newline translation.
+        data = CLEAR + frame.replace("\n", "\r\n")
+        self.f.write(json.dumps([round(t, 6), "o", data], ensure_ascii=False).encode("utf-8") + b"\n")
+
+class RawWriter:
+    """Length-prefixed frame records, see the module docstring."""
+
+    def __init__(self, f, cols, rows, title=None):
+        self.f = f
+
+    def write(self, t, frame):
+        data = frame.encode("utf-8")
+        self.f.write(f"{t:.6f} {len(data)}\n".encode("ascii"))
+        self.f.write(data)
+
+FORMATS = {"cast": AsciicastWriter, "raw": RawWriter}
+
+# --- Command Line ---
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="video file, or a URL to download with yt-dlp")
+    parser.add_argument("output", help="output file")
+    parser.add_argument("--format", choices=sorted(FORMATS), default=None,
+                        help="output format (default: cast for .cast files, raw otherwise)")
+    parser.add_argument("--size", default="80x24", help="terminal size COLSxROWS (default 80x24)")
+    parser.add_argument("--charset", choices=sorted(ytascii.CHARSETS), default="C",
+                        help="character set (default C)")
+    parser.add_argument("--color", choices=ytascii.COLOR_LADDER, default="none",
+                        help="color mode (default none)")
+    parser.add_argument("--palette", choices=sorted(ytascii.PALETTE_METHODS), default="cube",
+                        help="256-color mapping (default cube)")
+    parser.add_argument("--fps", type=float, help="override the frame rate used for timestamps")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes (default: one per core, 1 renders in-process)")
+    return parser.parse_args()
+
+def export(args, path):
+    cols, rows = (int(v) for v in args.size.lower().split("x"))
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        sys.exit(f"Cannot open {path}")
+    fps = args.fps or cap.get(cv2.CAP_PROP_FPS) or 24
+    cap.release()
+    fmt = args.format or ("cast" if args.output.endswith(".cast") else "raw")
+    chars = ytascii.CHARSETS[args.charset]
+
+    start = time.perf_counter()
+    frames = 0
+    with open(args.output, "wb") as f:
+        writer = FORMATS[fmt](f, cols, rows, title=args.source)
+        for frames, frame in enumerate(render_frames(path, cols, rows, chars, args.color, args.palette,
+                                                     args.processes), 1):
+            writer.write((frames - 1) / fps, frame)
+            if frames % 100 == 0:
+                print(f"\r{frames} frames", end="", file=sys.stderr, flush=True)
+    elapsed = time.perf_counter() - start
+    print(f"\rExported {frames} frames to {args.output} in {elapsed:.2f} s "
+          f"({frames / elapsed if elapsed else 0:.1f} frames/sec, {frames / fps / elapsed if elapsed else 0:.1f}x realtime)",
+          file=sys.stderr)
+
+def main():
+    args = parse_args()
+    if os.path.exists(args.source):
+        export(args, args.source)
+        return
+    args.output = os.path.abspath(args.output)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # MediaFetch writes video.mp4 into the working directory, re-encoded
+        # if OpenCV cannot decode what was downloaded
+        os.chdir(tmp)
+        try:
+            ytascii.MediaFetch(args.source).fetch()
+            export(args, os.path.join(tmp, "video.mp4"))
+        finally:
+            os.chdir(cwd)
+
+if __name__ == "__main__":
+    main()